@@ -1,5 +1,14 @@
+import gzip
 import json
-from typing import List, Dict, Optional
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import compress
+from operator import mul
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence
 
 # ================== 等级制映射 ==================
 GRADE_MAP = {
@@ -21,29 +30,43 @@ CORE_KEYWORDS = [
     "无线", "网络"
 ]
 
+def _compile_any(words: List[str]) -> re.Pattern:
+    """把一组子串编译为一个（小写）正则，一次扫描即可判断是否命中任一子串"""
+    if not words:
+        return re.compile(r"(?!)")  # 空列表：永不命中
+    return re.compile("|".join(re.escape(w.lower()) for w in words))
+
+_EXCLUDE_RE = _compile_any(EXCLUDE_COURSES)
+_CORE_RE = _compile_any(CORE_KEYWORDS)
+
 # ================== JSON 提取 ==================
-def extract_json_objects(text: str) -> List[str]:
-    objs, brace, start = [], 0, None
-    for i, ch in enumerate(text):
-        if ch == "{":
-            if brace == 0:
-                start = i
-            brace += 1
-        elif ch == "}":
-            brace -= 1
-            if brace == 0 and start is not None:
-                objs.append(text[start:i + 1])
-                start = None
-    return objs
-
-def load_all_rows_from_txt(path: str) -> List[Dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        text = f.read()
-    rows = []
-    for js in extract_json_objects(text):
-        data = json.loads(js)
-        rows.extend(data["datas"]["xscjcx"]["rows"])
-    return rows
+_DECODER = json.JSONDecoder()
+
+def iter_json_objects(text: str) -> Iterator[Dict]:
+    """依次解析文本中首尾相接的多个 JSON 对象，对象之外的字符跳过"""
+    i = text.find("{")
+    while i != -1:
+        obj, end = _DECODER.raw_decode(text, i)
+        yield obj
+        i = text.find("{", end)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def _open_grade_file(path: str):
+    """以二进制方式打开成绩文件；gzip 压缩的导出文件边读边解压"""
+    with open(path, "rb") as f:
+        is_gzip = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    return gzip.open(path, "rb") if is_gzip else open(path, "rb")
+
+def _read_grade_text(path: str) -> str:
+    """整份读出并解码为 str（去掉可能存在的 BOM）"""
+    with _open_grade_file(path) as f:
+        return f.read().decode("utf-8-sig")
+
+# 多页 JSON 直接拼接在一个文件中，每一页的课程都位于 datas.xscjcx.rows
+def iter_rows_from_txt(path: str) -> Iterator[Dict]:
+    for data in iter_json_objects(_read_grade_text(path)):
+        yield from data["datas"]["xscjcx"]["rows"]
 
 # ================== 成绩解析 ==================
 def parse_score(zcj) -> Optional[float]:
@@ -54,12 +77,62 @@ def parse_score(zcj) -> Optional[float]:
     except (TypeError, ValueError):
         return GRADE_MAP.get(str(zcj).strip())
 
+# ================== 课程表（列式存储） ==================
+@dataclass
+class Courses:
+    """按列存放课程：各列同一下标对应同一门课"""
+    names: List[str] = field(default_factory=list)
+    names_lower: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    scores: array = field(default_factory=lambda: array("d"))
+    credits: array = field(default_factory=lambda: array("d"))
+    estimated: List[bool] = field(default_factory=list)
+    estimate_reasons: List[str] = field(default_factory=list)
+    is_core: List[bool] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, name_lower: str, ctype: str, score: float,
+               credit: float, is_est: bool, msg: str, is_core: bool = False) -> None:
+        self.names.append(name)
+        self.names_lower.append(name_lower)
+        self.types.append(ctype)
+        self.scores.append(score)
+        self.credits.append(credit)
+        self.estimated.append(is_est)
+        self.estimate_reasons.append(msg)
+        self.is_core.append(is_core)
+
+    def select(self, mask: Iterable[bool]) -> "Courses":
+        """按布尔掩码取子集"""
+        mask = list(mask)
+        return Courses(
+            names=list(compress(self.names, mask)),
+            names_lower=list(compress(self.names_lower, mask)),
+            types=list(compress(self.types, mask)),
+            scores=array("d", compress(self.scores, mask)),
+            credits=array("d", compress(self.credits, mask)),
+            estimated=list(compress(self.estimated, mask)),
+            estimate_reasons=list(compress(self.estimate_reasons, mask)),
+            is_core=list(compress(self.is_core, mask)),
+        )
+
 # ================== Official 课程抽取 ==================
-def extract_official_courses(rows: List[Dict]) -> List[Dict]:
-    courses = []
+# 纳入 Official 计算的课程性质；映射到驻留后的同一个字符串对象，各课程共享
+_TYPE_INTERN = {t: sys.intern(t) for t in ("必修", "限选")}
+
+def extract_official_courses(rows: Iterable[Dict], tag_core: bool = True) -> Courses:
+    """tag_core：是否顺带按 is_core_major 标记 Core Major 课程（Courses.is_core）"""
+    courses = Courses()
+    # rows 为流式输入，总数未知，无法预分配；各列按需增长，这里只省去每行的属性查找
+    add_course = courses.append
 
     for r in rows:
-        if r.get("KCXZDM_DISPLAY") not in ("必修", "限选"):
+        # 先确认是字符串：列表等不可哈希的值直接跳过，而不是在查表时抛 TypeError
+        ctype_raw = r.get("KCXZDM_DISPLAY")
+        ctype = _TYPE_INTERN.get(ctype_raw) if isinstance(ctype_raw, str) else None
+        if ctype is None:
             continue
 
         credit_raw = r.get("XF")
@@ -71,104 +144,99 @@ def extract_official_courses(rows: List[Dict]) -> List[Dict]:
         if credit <= 0:
             continue
 
-        # 🔥 核心：统一从 estimate_zcj_from_row 拿成绩
-        score, is_est, msg = estimate_zcj_from_row(r)
+        # 🔥 核心：ZCJ 为数值时直接取用（非估算），否则统一从 estimate_zcj_from_row 拿成绩
+        score, is_est, msg = parse_float_safe(r.get("ZCJ")), False, "ZCJ present as numeric"
+        if score is None:
+            score, is_est, msg = estimate_zcj_from_row(r)
         if score is None:
             continue
 
-        courses.append({
-            "name": r.get("XSKCM"),
-            "type": r.get("KCXZDM_DISPLAY"),
-            "score": score,
-            "credit": credit,
-            "estimated": is_est,
-            "estimate_reason": msg
-        })
+        name = r.get("XSKCM")
+        name_lower = name.lower() if name else ""
+        is_core = tag_core and is_core_major(name_lower)
+        add_course(name, name_lower, ctype, score, credit, is_est, msg, is_core)
 
     return courses
 
 # ================== Core Major 判断 ==================
-def is_core_major(name: str) -> bool:
-    if not name:
+@lru_cache(maxsize=2048)
+def is_core_major(name_lower: str) -> bool:
+    """name_lower：已转小写的课程名（见 Courses.names_lower）"""
+    if not name_lower:
         return False
 
     # 显式排除水课
-    for ex in EXCLUDE_COURSES:
-        if ex in name:
-            return False
+    if _EXCLUDE_RE.search(name_lower):
+        return False
 
-    low = name.lower()
-    return any(k.lower() in low for k in CORE_KEYWORDS)
+    return _CORE_RE.search(name_lower) is not None
 
 # ================== 加权计算 ==================
-def weighted_avg(courses: List[Dict]) -> Optional[float]:
-    s = sum(c["score"] * c["credit"] for c in courses)
-    w = sum(c["credit"] for c in courses)
-    return s / w if w else None
+def _weighted_mean(values: Sequence[float], weights: Sequence[float]) -> Optional[float]:
+    w = sum(weights)
+    return sum(map(mul, values, weights)) / w if w else None
+
+def weighted_avg(courses: Courses) -> Optional[float]:
+    return _weighted_mean(courses.scores, courses.credits)
 
 # ================== 100 → 4.0（美式常用） ==================
+# 分数 ≥ GPA_THRESHOLDS[i] 时绩点为 GPA_POINTS[i + 1]
+GPA_THRESHOLDS = (63, 67, 70, 73, 77, 80, 83, 87, 90, 93)
+GPA_POINTS = (0.0, 1.0, 1.3, 1.7, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0)
+
+# 阈值均为整数，按整数分数 0..100 预先展开为查表（存 绩点×10）
+_GPA_LUT = bytes(round(GPA_POINTS[bisect_right(GPA_THRESHOLDS, s)] * 10) for s in range(101))
+
 def score_to_gpa(score: float) -> float:
-    if score >= 93: return 4.0
-    if score >= 90: return 3.7
-    if score >= 87: return 3.3
-    if score >= 83: return 3.0
-    if score >= 80: return 2.7
-    if score >= 77: return 2.3
-    if score >= 73: return 2.0
-    if score >= 70: return 1.7
-    if score >= 67: return 1.3
-    if score >= 63: return 1.0
-    return 0.0
-
-def weighted_gpa_4(courses: List[Dict]) -> Optional[float]:
-    total, w = 0.0, 0.0
-    for c in courses:
-        total += score_to_gpa(c["score"]) * c["credit"]
-        w += c["credit"]
-    return total / w if w else None
-
-
-
-def parse_float_safe(x):
+    return _GPA_LUT[int(min(100.0, max(0.0, score)))] / 10.0
+
+def weighted_gpa_4(courses: Courses) -> Optional[float]:
+    return _weighted_mean(list(map(score_to_gpa, courses.scores)), courses.credits)
+
+
+
+def parse_float_safe(x) -> Optional[float]:
+    """数值或数值字符串 → float；None、空串、“待评教”、NA、NaN 等一律返回 None"""
+    # bool 是 int 的子类，但不是成绩
+    if isinstance(x, bool):
+        return None
     try:
-        if x is None: return None
-        s = str(x).strip()
-        if s == "" or s.lower() in ("待评教", "na", "n/a"): return None
-        return float(s)
-    except:
+        # float() 自带去除首尾空白，非数值字符串（含“待评教”“n/a”）直接抛错
+        v = float(x)
+    except (TypeError, ValueError, OverflowError):
         return None
+    return v if v == v else None
+
 
+# 分项成绩与权重字段：QMCJ (期末), PSCJ (平时), QZCJ (其他/综合)
+_COMP_NAMES = (
+    ("QMCJ", "QMCJXS"),
+    ("PSCJ", "PSCJXS"),
+    ("QZCJ", "QZCJXS")
+)
 
-def estimate_zcj_from_row(row):
+def estimate_zcj_from_row(row, _pf=parse_float_safe, _comp=_COMP_NAMES):
     """
-    输入：单条记录（dict）
+    输入：单条记录（dict），其 ZCJ 不是数值（数值 ZCJ 由 extract_official_courses 直接取用）
     输出： (zcj_value (float or None), is_estimate (bool), message (str))
     """
-    # 如果系统已给出且为数值，直接返回（非估算）
-    zcj_raw = row.get("ZCJ")
-    zcj_val = parse_float_safe(zcj_raw)
-    if zcj_val is not None:
-        return zcj_val, False, "ZCJ present as numeric"
+    row_get = row.get
+    zcj_raw = row_get("ZCJ")
 
     # 尝试把文字等级映射为数值
-    if isinstance(zcj_raw, str) and zcj_raw.strip() in GRADE_MAP:
-        return float(GRADE_MAP[zcj_raw.strip()]), False, "ZCJ mapped from grade label"
-
-    # 取分项成绩与权重
-    # 常见字段名：QMCJ (期末), PSCJ (平时), QZCJ (其他/综合)
-    comp_names = [
-        ("QMCJ", "QMCJXS"),
-        ("PSCJ", "PSCJXS"),
-        ("QZCJ", "QZCJXS")
-    ]
+    if isinstance(zcj_raw, str):
+        grade = GRADE_MAP.get(zcj_raw.strip())
+        if grade is not None:
+            return float(grade), False, "ZCJ mapped from grade label"
 
+    # 取分项成绩与权重（字段见 _COMP_NAMES）
     total_weight = 0.0
     weighted_sum = 0.0
     have_any = False
 
-    for score_key, weight_key in comp_names:
-        s = parse_float_safe(row.get(score_key))
-        w = parse_float_safe(row.get(weight_key))
+    for score_key, weight_key in _comp:
+        s = _pf(row_get(score_key))
+        w = _pf(row_get(weight_key))
         # 有时权重是字符串"50"或"50.0"或缺失
         if s is None:
             continue
@@ -288,42 +356,46 @@ By using this software, you acknowledge that you have read, understood, and agre
 在任何情況下，作者均不對因使用本軟體所導致的任何直接或間接損失承擔責任。
 
 一經使用本軟體，即表示您已閱讀、理解並同意本免責聲明之全部內容。\n""")
-    print("\033[1;36mPress ENTER to ACCEPT the terms and continue\033[0m")
-    print("\033[1;36mPress ENTER to ACCEPT the terms and continue\033[0m")
     print("\033[1;36mPress ENTER to ACCEPT the terms and continue\033[0m")
     input("\033[1;36m请按任意键接受条款，进入程序：\033[0m\n\n")
 
-    rows = load_all_rows_from_txt("成绩.txt")
+    rows = iter_rows_from_txt("成绩.txt")
 
     # ===== ① Official 全量课程 =====
     official = extract_official_courses(rows)
 
     print("========== Official 参与计算的全部课程 ==========\n")
-    for c in official:
-        print(f"- {c['name']} | {c['type']} | 成绩={c['score']} | 学分={c['credit']}")
+    # 整块拼好后一次写出，避免逐门课程 print
+    sys.stdout.write("".join(
+        f"- {name} | {ctype} | 成绩={score} | 学分={credit}\n"
+        for name, ctype, score, credit in zip(official.names, official.types,
+                                              official.scores, official.credits)
+    ))
 
     official_avg = weighted_avg(official)
 
     print("\n🎓 Official（必修 + 限选）加权均分（100制）：")
-    print(f"{official_avg:.3f}" if official_avg else "N/A")
+    print(f"{official_avg:.3f}" if official_avg is not None else "N/A")
 
     # ===== ② Core Major 子集 =====
-    core = [c for c in official if is_core_major(c["name"])]
+    core = official.select(official.is_core)
 
     print("\n========== Core Major 课程（Official 子集） ==========\n")
-    for c in core:
-        print(f"- {c['name']} | 成绩={c['score']} | 学分={c['credit']}")
+    sys.stdout.write("".join(
+        f"- {name} | 成绩={score} | 学分={credit}\n"
+        for name, score, credit in zip(core.names, core.scores, core.credits)
+    ))
 
     core_avg_100 = weighted_avg(core)
     core_avg_4 = weighted_gpa_4(core)
 
     print("\n🎓 Core Major 加权均分（100制）：")
-    print(f"{core_avg_100:.3f}" if core_avg_100 else "N/A")
+    print(f"{core_avg_100:.3f}" if core_avg_100 is not None else "N/A")
 
     print("\n🎓 Core Major GPA（4.0制，美式）：")
-    input("请按任意键三次退出：")
-    input("请按任意键三次退出：")
-    input("请按任意键三次退出：")
+    print(f"{core_avg_4:.3f}" if core_avg_4 is not None else "N/A")
+
+    input("请按回车键退出：")
 
 
 if __name__ == "__main__":